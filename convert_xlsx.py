@@ -0,0 +1,15 @@
+import pandas as pd
+
+EXCEL_PATH   = "Occupation_Data.xlsx"
+PARQUET_PATH = "Occupation_Data.parquet"
+
+ROLE_COL    = "Title"
+CONTEXT_COL = "Description"
+
+# One-time conversion: the Arrow-backed Parquet file loads orders of magnitude
+# faster than re-parsing the xlsx XML on every start. Re-run after editing the
+# Excel file.
+df = pd.read_excel(EXCEL_PATH, usecols=[ROLE_COL, CONTEXT_COL], dtype=str)
+df.to_parquet(PARQUET_PATH, compression="zstd")
+
+print("✅ Converted", len(df), "rows to", PARQUET_PATH)
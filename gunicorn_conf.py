@@ -0,0 +1,11 @@
+import os
+
+# Gunicorn configuration for production deployments:
+#   gunicorn -c gunicorn_conf.py main:app
+# Size workers to the host (WEB_CONCURRENCY, e.g. $(nproc)) and set
+# OLLAMA_NUM_PARALLEL to match so N workers x K in-flight async requests can
+# all be generating at once. The long timeout covers slow model generations.
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 300
+keepalive = 30
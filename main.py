@@ -1,7 +1,12 @@
 """
 Art Of Prompting - FastAPI application (single-file)
 Author: ChatGPT (example)
-Run with: gunicorn -k uvicorn.workers.UvicornWorker main:app -w 4
+Run with: gunicorn -c gunicorn_conf.py main:app
+
+For concurrent Mistral + Qwen generation, configure the Ollama server with:
+  OLLAMA_NUM_PARALLEL=2
+  OLLAMA_MAX_LOADED_MODELS=2
+so both models can be resident and answer at the same time.
 
 Requirements (pip):
   - fastapi
@@ -9,7 +14,8 @@ Requirements (pip):
   - pandas
   - sqlalchemy
   - pymysql         # or mysqlclient
-  - requests
+  - httpx
+  - orjson
   - jinja2
   - python-multipart
   - pdfkit (optional for PDF generation)
@@ -17,18 +23,25 @@ Requirements (pip):
 """
 
 import os
-import io
-import json
-import tempfile
+import html
+import time
+import asyncio
+import hashlib
+import sqlite3
+import functools
 from typing import List, Optional
 from fastapi import FastAPI, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import orjson
 import pandas as pd
-from sqlalchemy import create_engine, text
-import requests
+from openpyxl import load_workbook
+from sqlalchemy import create_engine, text, MetaData, Table, select, bindparam
+import httpx
+from starlette.middleware.gzip import GZipMiddleware
 from starlette.responses import RedirectResponse
 
 # Optional pdf generation
@@ -42,6 +55,8 @@ except Exception:
 # CONFIGURATION - EDIT THESE TO MATCH YOUR ENVIRONMENT
 # -----------------------
 EXCEL_PATH = os.environ.get("KCOMP_PATH", "Occupation_Data.xlsx")
+# Column in the Excel file that holds the role names
+EXCEL_ROLE_COLUMN = os.environ.get("EXCEL_ROLE_COLUMN", "Title")
 # MySQL connection string (SQLAlchemy) - update user, password, host, port, dbname
 mysql_username="promptuser"
 mysql_password="promptuser123"
@@ -53,11 +68,17 @@ CONTEXT_TABLE = os.environ.get("CONTEXT_TABLE", "role_contexts")
 ROLE_COLUMN = os.environ.get("ROLE_COLUMN", "role")
 CONTEXT_COLUMN = os.environ.get("CONTEXT_COLUMN", "context")
 
+# SQLite cache of generated completions (set CACHE_MAX_ROWS=0 to disable)
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "cache.db")
+CACHE_MAX_ROWS = int(os.environ.get("CACHE_MAX_ROWS", "50000"))
+
 # Ollama endpoint (local)
 OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 # Ollama model names (change to your local model names)
 MISTRAL_MODEL = os.environ.get("MISTRAL_MODEL", "mistral:latest")        # example name
 QWEN_MODEL = os.environ.get("QWEN_MODEL", "qwen3:4b")                     # example name
+# How long Ollama should keep model weights resident after a request
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "1h")
 
 # Available formats & styles - you can expand
 PREDEFINED_FORMATS = [
@@ -81,7 +102,8 @@ PREPOPULATED_STYLES = [
 # -----------------------
 # Initialize
 # -----------------------
-app = FastAPI(title="Art Of Prompting - API")
+# orjson serializes every JSON response in C instead of stdlib json
+app = FastAPI(title="Art Of Prompting - API", default_response_class=ORJSONResponse)
 
 # Allow CORS for local frontend usage (optional)
 app.add_middleware(
@@ -91,39 +113,99 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Compress text/JSON responses (index page, role lists, HTML reports); gzip
+# at level 5 is negligible CPU next to model latency.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # mount static if you want (not necessary here)
 if not os.path.exists("static"):
     os.makedirs("static", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Shared HTTP client for talking to Ollama. Reusing one client keeps a pool
+# of keep-alive connections instead of a TCP handshake per model call.
+@app.on_event("startup")
+async def startup_http_client():
+    app.state.http = httpx.AsyncClient(
+        timeout=None,
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
+    # Warm both models so the first real request doesn't pay the one-time
+    # weight-load cost; keep_alive stops Ollama unloading them in between.
+    models = (MISTRAL_MODEL, QWEN_MODEL)
+    results = await asyncio.gather(
+        *[app.state.http.post(
+            f"{OLLAMA_HOST}/api/generate",
+            json={"model": m, "prompt": "warmup", "stream": False,
+                  "keep_alive": OLLAMA_KEEP_ALIVE, "options": {"num_predict": 1}},
+        ) for m in models],
+        return_exceptions=True,
+    )
+    for m, r in zip(models, results):
+        if isinstance(r, Exception):
+            print(f"[warning] Could not warm up model {m}: {r}")
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await app.state.http.aclose()
+
 # Load roles from EXCEL at startup
+@functools.lru_cache(maxsize=4)
+def _load_roles_cached(path: str, mtime: float) -> List[str]:
+    # Stream the workbook row by row with openpyxl's read-only mode instead
+    # of materializing a DataFrame; memory stays O(unique roles). The mtime
+    # key means repeat calls for an unchanged file never touch openpyxl again.
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        # Prefer the configured column; fall back to the first column that
+        # looks like a role/name column.
+        idx = None
+        for i, name in enumerate(header):
+            if name == EXCEL_ROLE_COLUMN:
+                idx = i
+                break
+        if idx is None:
+            for i, name in enumerate(header):
+                if name and str(name).lower().startswith(("title", "name")):
+                    idx = i
+                    break
+        if idx is None:
+            print(f"[warning] No role column found in {path}. Continuing with empty roles.")
+            return []
+        # dict.fromkeys removes duplicates in one C-level pass while
+        # preserving insertion order
+        return list(dict.fromkeys(
+            str(row[idx]) for row in rows if len(row) > idx and row[idx]
+        ))
+    finally:
+        wb.close()
+
+@functools.lru_cache(maxsize=4)
+def _load_roles_parquet(path: str, mtime: float) -> List[str]:
+    series = pd.read_parquet(path, columns=[EXCEL_ROLE_COLUMN])[EXCEL_ROLE_COLUMN].dropna()
+    # dict.fromkeys removes duplicates in one C-level pass while preserving
+    # insertion order
+    return list(dict.fromkeys(series.astype(str)))
+
 def load_roles_from_excel(path: str) -> List[str]:
+    # Prefer the Parquet sidecar produced by convert_xlsx.py: Arrow's C++
+    # reader is far faster than parsing the xlsx XML with openpyxl.
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path):
+        return _load_roles_parquet(parquet_path, os.path.getmtime(parquet_path))
     if not os.path.exists(path):
         print(f"[warning] Excel file not found at {path}. Continuing with empty roles.")
         return []
-    df = pd.read_excel(path)
-    # Heuristic: find first column that looks like Role/role/name
-    col_candidates = [c for c in df.columns if 'Title' in c.lower() or 'name' in c.lower()]
-    if not col_candidates:
-        # fallback to first column
-        col = df.columns[1]
-    else:
-        col = col_candidates[1]
-    roles = df[col].dropna().astype(str).tolist()
-    # Remove duplicates while preserving order
-    seen = set()
-    out = []
-    for r in roles:
-        if r not in seen:
-            seen.add(r)
-            out.append(r)
-    return out
+    return _load_roles_cached(path, os.path.getmtime(path))
 
 ROLES = load_roles_from_excel(EXCEL_PATH)
 
 # Setup DB engine (SQLAlchemy)
 try:
-    engine = create_engine(MYSQL_URL, pool_pre_ping=True)
+    engine = create_engine(MYSQL_URL, pool_pre_ping=True,
+                           pool_size=10, max_overflow=20, pool_recycle=3600)
     # test connection
     with engine.connect() as conn:
         pass
@@ -131,104 +213,159 @@ except Exception as e:
     engine = None
     print(f"[warning] Could not create DB engine: {e}. Context fetching will fail until configured.")
 
+# Reflect the context table once and pre-build the per-role lookup statement,
+# so fallback queries reuse one compiled construct instead of re-parsing SQL
+# text on every call.
+CTX_STMT = None
+if engine is not None:
+    try:
+        ctx_table = Table(CONTEXT_TABLE, MetaData(), autoload_with=engine)
+        CTX_STMT = (
+            select(ctx_table.c[CONTEXT_COLUMN])
+            .where(ctx_table.c[ROLE_COLUMN] == bindparam("role"))
+            .limit(1)
+        )
+    except Exception as e:
+        print(f"[warning] Could not reflect table {CONTEXT_TABLE}: {e}")
+
+# Completion cache: (model, prompt, max_tokens) -> generated text. Identical
+# prompts are common when comparing models in the UI, and a cache hit skips
+# the full model runtime.
+try:
+    cache_db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False) if CACHE_MAX_ROWS > 0 else None
+    if cache_db is not None:
+        cache_db.execute("PRAGMA journal_mode=WAL")
+        cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS generate_cache (key TEXT PRIMARY KEY, ts INTEGER, response TEXT)"
+        )
+        cache_db.commit()
+except Exception as e:
+    cache_db = None
+    print(f"[warning] Could not open completion cache at {CACHE_DB_PATH}: {e}. Caching disabled.")
+
 # -----------------------
 # Helper functions
 # -----------------------
 
+def load_contexts() -> dict:
+    """
+    Load the whole role->context table into a dict. The table is static
+    (populated once from Excel), so keeping it in-process turns every lookup
+    into a hash hit instead of a MySQL round-trip.
+    """
+    if engine is None:
+        return {}
+    query = text(f"SELECT `{ROLE_COLUMN}`, `{CONTEXT_COLUMN}` FROM `{CONTEXT_TABLE}`")
+    try:
+        with engine.connect() as conn:
+            return dict(conn.execute(query).all())
+    except Exception as e:
+        print(f"[warning] Could not preload contexts: {e}")
+        return {}
+
+CONTEXTS = load_contexts()
+
 def fetch_context_for_role(role: str) -> str:
     """
-    Fetch context text from MySQL table for the given role.
-    Expects table with ROLE_COLUMN and CONTEXT_COLUMN.
+    Fetch context text for the given role from the preloaded cache,
+    falling back to a direct MySQL query if the role is not cached.
     """
+    if role in CONTEXTS:
+        return CONTEXTS[role] or ""
     if engine is None:
         return ""
-    query = text(f"SELECT `{CONTEXT_COLUMN}` FROM `{CONTEXT_TABLE}` WHERE `{ROLE_COLUMN}` = :role LIMIT 1")
+    query = CTX_STMT if CTX_STMT is not None else text(
+        f"SELECT `{CONTEXT_COLUMN}` FROM `{CONTEXT_TABLE}` WHERE `{ROLE_COLUMN}` = :role LIMIT 1"
+    )
     with engine.connect() as conn:
         res = conn.execute(query, {"role": role}).fetchone()
         if res:
             return res[0] or ""
     return ""
 
+# Prompt fields in output order as (label, payload key); empty fields are
+# skipped, so the order is data-driven rather than hard-coded appends.
+PROMPT_FIELDS = (
+    ("Role", "role"),
+    ("Context", "context"),
+    ("Example", "example"),
+    ("Target audience", "audience"),
+    ("Format", "format"),
+    ("Style", "style"),
+    ("Constraints", "constraints"),
+    ("Task", "task"),
+)
+PROMPT_TRAILER = ("\n\n\nPlease produce a complete, well-structured response for the task above. "
+                  "Label sections clearly if appropriate and keep responses within reasonable length.")
+
 def make_prompt(payload: dict) -> str:
     """
     Compose a single prompt string from the UI details.
     payload should contain role, context, example, audience, format, style, constraints, task
     """
-    parts = []
-    parts.append(f"Role: {payload.get('role','')}")
-    context = payload.get('context','')
-    if context:
-        parts.append(f"Context:\n{context}")
-    example = payload.get('example','')
-    if example:
-        parts.append(f"Example:\n{example}")
-    audience = payload.get('audience','')
-    if audience:
-        parts.append(f"Target audience: {audience}")
-    fmt = payload.get('format','')
-    if fmt:
-        parts.append(f"Format: {fmt}")
-    style = payload.get('style','')
-    if style:
-        parts.append(f"Style: {style}")
-    constraints = payload.get('constraints','')
-    if constraints:
-        parts.append(f"Constraints: {constraints}")
-    task = payload.get('task','')
-    if task:
-        parts.append(f"Task:\n{task}")
-    # Make a final instruction to the model
-    parts.append("\nPlease produce a complete, well-structured response for the task above. "
-                 "Label sections clearly if appropriate and keep responses within reasonable length.")
-    return "\n\n".join(parts)
-
-def call_ollama_generate(model_name: str, prompt: str, max_tokens: int = 512, stream=False):
+    return "\n\n".join(
+        f"{label}: {value}" for label, key in PROMPT_FIELDS if (value := payload.get(key))
+    ) + PROMPT_TRAILER
+
+def cache_lookup(key: str) -> Optional[str]:
+    """Return the cached completion for key, refreshing its LRU timestamp."""
+    if cache_db is None:
+        return None
+    row = cache_db.execute("SELECT response FROM generate_cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    cache_db.execute("UPDATE generate_cache SET ts = ? WHERE key = ?", (int(time.time()), key))
+    cache_db.commit()
+    return row[0]
+
+def cache_store(key: str, response: str):
+    """Store a completion and evict the least-recently-used overflow rows."""
+    if cache_db is None:
+        return
+    cache_db.execute(
+        "INSERT OR REPLACE INTO generate_cache (key, ts, response) VALUES (?, ?, ?)",
+        (key, int(time.time()), response),
+    )
+    cache_db.execute(
+        "DELETE FROM generate_cache WHERE key IN "
+        "(SELECT key FROM generate_cache ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+        (CACHE_MAX_ROWS,),
+    )
+    cache_db.commit()
+
+async def call_ollama_generate(client: httpx.AsyncClient, model_name: str, prompt: str, max_tokens: int = 512, stream=False):
     """
     Call local Ollama /api/generate?model=<model_name>
-    Returns the generated text (or raises).
+    Returns the generated text (or raises). Async so both models can run
+    concurrently via asyncio.gather without blocking the event loop.
     """
+    cache_key = hashlib.blake2b(
+        f"{model_name}|{max_tokens}|{prompt}".encode(), digest_size=16
+    ).hexdigest()
+    cached = cache_lookup(cache_key)
+    if cached is not None:
+        return cached
+
     url = f"{OLLAMA_HOST}/api/generate"
     headers = {"Content-Type": "application/json"}
     payload = {
         "model":model_name,
         "prompt": prompt,
         "max_tokens": max_tokens,
-        "stream":False
+        "stream":False,
+        "keep_alive": OLLAMA_KEEP_ALIVE
         # you may add other parameters like temperature, top_p, stop, etc.
     }
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+        response = await client.post(url, headers=headers, content=orjson.dumps(payload))
         response.raise_for_status()
-        # Ollama typically returns JSON with a "container" or "output" structure - but to be robust,
-        # try to parse text from common fields.
+        # With "stream": False Ollama returns a single JSON object, so no
+        # line-by-line parsing is needed.
         data = response.json()
-        full_response = ""
-        for line in response.iter_lines():
-          if line:
-              # Decode the line and parse the JSON object
-              decoded_line = line.decode('utf-8')
-              try:
-                  json_data = json.loads(decoded_line)
-                  
-                  # Extract the 'response' part of the data chunk
-                  chunk = json_data.get("response", "")
-                  
-                  # Print the chunk immediately
-                  print(chunk, end="", flush=True)
-                  
-                  # Accumulate for the full response if needed later
-                  full_response += chunk
-                  
-                  # Check for the end of the stream
-                  if json_data.get("done"):
-                      break
-              except json.JSONDecodeError:
-                  # Handle cases where a line might not be a valid JSON object
-                  # (This is less common but good for robustness)
-                  pass
-
-        return full_response
-    except requests.RequestException as e:
+        generated = data.get("response", "")
+        cache_store(cache_key, generated)
+        return generated
+    except httpx.HTTPError as e:
         raise RuntimeError(f"Ollama request failed: {e}")
 
 # -----------------------
@@ -248,14 +385,10 @@ class GenerateRequest(BaseModel):
 # Routes - API
 # -----------------------
 
-@app.get("/", response_class=HTMLResponse)
-async def index():
-    """
-    Serve the single-page UI (HTML + JS). 
-    This returns a complete HTML page using Bootstrap for quick styling.
-    """
-    # The HTML is intentionally self-contained (JS calls the endpoints below)
-    html = f"""
+# The single-page UI (HTML + JS) depends only on module-level constants, so
+# it is rendered once at import time and served as pre-encoded bytes.
+# The HTML is intentionally self-contained (JS calls the endpoints below)
+INDEX_HTML = f"""
 <!doctype html>
 <html lang="en">
   <head>
@@ -501,19 +634,39 @@ async def index():
 
   </body>
 </html>
+"""
+INDEX_BYTES = INDEX_HTML.encode("utf-8")
+INDEX_ETAG = '"%s"' % hashlib.blake2b(INDEX_BYTES, digest_size=8).hexdigest()
+
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request):
+    """
+    Serve the single-page UI, pre-rendered at import time.
+    This returns a complete HTML page using Bootstrap for quick styling.
     """
-    return HTMLResponse(content=html, status_code=200)
+    headers = {"Cache-Control": "public, max-age=300", "ETag": INDEX_ETAG}
+    if request.headers.get("if-none-match") == INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=INDEX_BYTES, status_code=200, headers=headers)
 
 @app.get("/api/roles")
 async def api_roles():
     """Return list of roles loaded from the Excel file"""
-    return JSONResponse(content=ROLES)
+    # Roles rarely change, so let browsers cache them briefly
+    return ORJSONResponse(content=ROLES, headers={"Cache-Control": "private, max-age=60"})
 
 @app.get("/api/context")
 async def api_context(role: str):
     """Return the context for the given role fetched from MySQL"""
     ctx = fetch_context_for_role(role)
-    return JSONResponse(content={"context": ctx})
+    return ORJSONResponse(content={"context": ctx})
+
+@app.post("/api/reload")
+async def api_reload():
+    """Refresh the role->context cache from MySQL without restarting."""
+    global CONTEXTS
+    CONTEXTS = load_contexts()
+    return ORJSONResponse(content={"status": "ok", "contexts": len(CONTEXTS)})
 
 @app.post("/api/generate")
 async def api_generate(req: GenerateRequest):
@@ -524,19 +677,20 @@ async def api_generate(req: GenerateRequest):
     payload = req.dict()
     prompt = make_prompt(payload)
 
-    # Call Mistral
-    try:
-        mistral_out = call_ollama_generate(MISTRAL_MODEL, prompt, max_tokens=1024)
-    except Exception as e:
-        mistral_out = f"[Error calling Mistral model {MISTRAL_MODEL}: {e}]"
-
-    # Call Qwen
-    try:
-        qwen_out = call_ollama_generate(QWEN_MODEL, prompt, max_tokens=1024)
-    except Exception as e:
-        qwen_out = f"[Error calling Qwen model {QWEN_MODEL}: {e}]"
-
-    return JSONResponse(content={"mistral": mistral_out, "qwen": qwen_out})
+    # Fire both models concurrently; total latency is max(mistral, qwen)
+    # rather than their sum.
+    client = app.state.http
+    mistral_out, qwen_out = await asyncio.gather(
+        call_ollama_generate(client, MISTRAL_MODEL, prompt, max_tokens=1024),
+        call_ollama_generate(client, QWEN_MODEL, prompt, max_tokens=1024),
+        return_exceptions=True,
+    )
+    if isinstance(mistral_out, Exception):
+        mistral_out = f"[Error calling Mistral model {MISTRAL_MODEL}: {mistral_out}]"
+    if isinstance(qwen_out, Exception):
+        qwen_out = f"[Error calling Qwen model {QWEN_MODEL}: {qwen_out}]"
+
+    return ORJSONResponse(content={"mistral": mistral_out, "qwen": qwen_out})
 
 @app.post("/api/report")
 async def api_report(payload: dict):
@@ -548,6 +702,12 @@ async def api_report(payload: dict):
     mistral = payload.get("mistral", "")
     qwen = payload.get("qwen", "")
 
+    # Escape the model outputs once so literal <, > or script fragments can't
+    # break out of the <pre> blocks (or trigger the browser's slow HTML
+    # error-recovery parsing on malformed markup).
+    mistral_escaped = html.escape(mistral)
+    qwen_escaped = html.escape(qwen)
+
     # Build a basic HTML report
     html_content = f"""
 <!doctype html>
@@ -558,30 +718,47 @@ async def api_report(payload: dict):
 <body>
 <h1>Art Of Prompting - Report</h1>
 <h2>Mistral Output</h2>
-<div class="box"><pre style="white-space:pre-wrap">{mistral}</pre></div>
+<div class="box"><pre style="white-space:pre-wrap">{mistral_escaped}</pre></div>
 <h2>Qwen Output</h2>
-<div class="box"><pre style="white-space:pre-wrap">{qwen}</pre></div>
+<div class="box"><pre style="white-space:pre-wrap">{qwen_escaped}</pre></div>
 </body></html>
 """
+    # Reports are built entirely in memory - no temp files, no disk round-trip
+    # (FileResponse expects an on-disk path and errored on BytesIO objects).
     if rtype == "txt":
         txt = f"=== Mistral Output ===\n{mistral}\n\n=== Qwen Output ===\n{qwen}\n"
-        return FileResponse(io.BytesIO(txt.encode("utf-8")), media_type="text/plain", filename="art_of_prompting_report.txt")
+        return Response(content=txt.encode("utf-8"), media_type="text/plain",
+                        headers={"Content-Disposition": 'attachment; filename="art_of_prompting_report.txt"'})
     elif rtype == "html":
-        b = io.BytesIO(html_content.encode("utf-8"))
-        return FileResponse(b, media_type="text/html", filename="art_of_prompting_report.html")
+        return Response(content=html_content.encode("utf-8"), media_type="text/html",
+                        headers={"Content-Disposition": 'attachment; filename="art_of_prompting_report.html"'})
     elif rtype == "pdf":
         if not PDFKIT_AVAILABLE:
-            return JSONResponse(status_code=400, content={"error": "PDF generation not available on server (pdfkit/wkhtmltopdf missing)."})
-        # generate pdf to temp file
-        tmpf = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        tmpf.close()
-        # pdfkit.from_string requires wkhtmltopdf installed and accessible
-        pdfkit.from_string(html_content, tmpf.name)
-        return FileResponse(tmpf.name, media_type="application/pdf", filename="art_of_prompting_report.pdf")
+            return ORJSONResponse(status_code=400, content={"error": "PDF generation not available on server (pdfkit/wkhtmltopdf missing)."})
+        # pdfkit.from_string requires wkhtmltopdf installed and accessible;
+        # passing False as the output path makes it return the PDF bytes.
+        # The wkhtmltopdf subprocess can take seconds, so run it in the
+        # threadpool to keep the event loop free for other requests.
+        pdf_bytes = await run_in_threadpool(pdfkit.from_string, html_content, False)
+        return Response(content=pdf_bytes, media_type="application/pdf",
+                        headers={"Content-Disposition": 'attachment; filename="art_of_prompting_report.pdf"'})
     else:
-        return JSONResponse(status_code=400, content={"error": "Unknown report type"})
+        return ORJSONResponse(status_code=400, content={"error": "Unknown report type"})
 
 # Simple health check
 @app.get("/api/health")
-async def health():
-    return JSONResponse(content={"status": "ok", "mistral_model": MISTRAL_MODEL, "qwen_model": QWEN_MODEL})
+async def health(deep: bool = False):
+    """
+    Liveness check. Pass ?deep=true to also ping Ollama so a load balancer
+    can route away from workers whose model server is unreachable.
+    """
+    status = {"status": "ok", "mistral_model": MISTRAL_MODEL, "qwen_model": QWEN_MODEL}
+    if deep:
+        try:
+            r = await app.state.http.head(OLLAMA_HOST, timeout=5)
+            r.raise_for_status()
+            status["ollama"] = "ok"
+        except Exception as e:
+            status.update(status="degraded", ollama=f"unreachable: {e}")
+            return ORJSONResponse(status_code=503, content=status)
+    return ORJSONResponse(content=status)
@@ -2,13 +2,16 @@
 requirements = [
     "fastapi",
     "uvicorn",
+    "gunicorn",         # production server (see gunicorn_conf.py)
     "pandas",
     "sqlalchemy",
     "pymysql",          # or mysqlclient if you prefer
-    "requests",
+    "httpx",
+    "orjson",           # fast JSON serialization
     "jinja2",
     "python-multipart",
     "openpyxl",         # for reading the Excel file
+    "pyarrow",          # Parquet sidecar (see convert_xlsx.py)
     "pdfkit",           # optional, only if you want PDF report generation
 ]
 